@@ -7,9 +7,50 @@ import pymupdf as fitz  # PyMuPDF (import pymupdf, not fitz directly)
 import json
 import sys
 import os
+import multiprocessing
 from pathlib import Path
 from PIL import Image
+import numpy as np
 import io
+import math
+
+# Rendering settings shared by every page (get_pixmap only reads the matrix)
+_SCALE_2X = fitz.Matrix(2.0, 2.0)  # 2x scale for high quality
+JPEG_QUALITY = 90
+
+def render_matrix(scale):
+    """Zoom matrix for a render scale (1.0 for thumbnails, 2.0 by default)"""
+    return _SCALE_2X if scale == 2.0 else fitz.Matrix(scale, scale)
+
+
+def normalize_scale(scale):
+    """Return scale as a float, rejecting zero, negative and non-finite values"""
+    try:
+        scale = float(scale)
+    except (TypeError, ValueError):
+        raise ValueError(f"scale must be a number, got {scale!r}")
+
+    if not (math.isfinite(scale) and scale > 0):
+        raise ValueError(f"scale must be a positive number, got {scale!r}")
+
+    return scale
+
+# Optional: libjpeg-turbo through PyTurboJPEG for faster JPEG encoding.
+# Falls back to Pillow if the package or the shared library is missing.
+try:
+    from turbojpeg import TurboJPEG, TJPF_RGB, TJSAMP_420
+    _turbo_jpeg = TurboJPEG()
+except Exception:
+    _turbo_jpeg = None
+
+# Optional: orjson is several times faster than json for the large text_data output
+try:
+    import orjson
+
+    def _dumps(obj):
+        return orjson.dumps(obj).decode()
+except ImportError:
+    _dumps = json.dumps
 
 def analyze_pages(pdf_path):
     """Analyze PDF pages to detect double pages"""
@@ -39,37 +80,106 @@ def analyze_pages(pdf_path):
     doc.close()
     return page_structure
 
-def process_single_page(pdf_path, page_index, output_page_number, output_dir):
+# Page directories already created by this process
+_created_dirs = set()
+
+def get_pages_dir(output_dir):
+    """Return output_dir/pages, creating it only the first time it is seen"""
+    pages_dir = output_dir / 'pages'
+    if pages_dir not in _created_dirs:
+        pages_dir.mkdir(parents=True, exist_ok=True)
+        _created_dirs.add(pages_dir)
+    return pages_dir
+
+def save_jpeg(pix, jpg_path):
+    """Encode an RGB pixmap (no alpha) to JPEG without going through a PNG file"""
+    # Encode in memory, then write the whole file at once instead of
+    # going through Pillow's small buffered writes
+    # pix.samples_mv is a zero-copy view of the pixel buffer (pix.samples
+    # would copy it); pix stays alive until the encode is done
+    if _turbo_jpeg is not None:
+        pixels = np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(pix.height, pix.width, 3)
+        # 4:2:0 like Pillow at this quality (PyTurboJPEG defaults to 4:2:2),
+        # so both encoders give equivalent files
+        data = _turbo_jpeg.encode(pixels, quality=JPEG_QUALITY, pixel_format=TJPF_RGB, jpeg_subsample=TJSAMP_420)
+    else:
+        buf = io.BytesIO()
+        img = Image.frombuffer("RGB", (pix.width, pix.height), pix.samples_mv, "raw", "RGB", 0, 1)
+        img.save(buf, 'JPEG', quality=JPEG_QUALITY)
+        data = buf.getbuffer()
+
+    Path(jpg_path).write_bytes(data)
+
+# Raster formats save_images can write
+IMAGE_FORMATS = ('jpg', 'png')
+
+def normalize_formats(formats):
+    """Return formats as a tuple, accepting a single format name as a string
+
+    Called once at the entry points; the functions below trust their formats.
+    """
+    if isinstance(formats, str):
+        formats = (formats,)
+    elif not isinstance(formats, (list, tuple)):
+        raise ValueError(f"formats must be a list of {IMAGE_FORMATS}, got {formats!r}")
+
+    if not formats:
+        raise ValueError(f"formats must name at least one of {IMAGE_FORMATS}")
+
+    unsupported = [fmt for fmt in formats if fmt not in IMAGE_FORMATS]
+    if unsupported:
+        raise ValueError(f"Unsupported image format(s) {unsupported!r} (expected some of {IMAGE_FORMATS})")
+
+    return tuple(formats)
+
+def save_images(pix, pages_dir, page_prefix, formats):
+    """Write the pixmap in the requested formats; returns (png_path, jpg_path), None if skipped"""
+    png_path = None
+    jpg_path = None
+
+    # PNG is opt-in: it is large and slow to compress
+    if 'png' in formats:
+        png_path = pages_dir / f"{page_prefix}.png"
+        pix.save(str(png_path))
+
+    if 'jpg' in formats:
+        jpg_path = pages_dir / f"{page_prefix}.jpg"
+        save_jpeg(pix, jpg_path)
+
+    return png_path, jpg_path
+
+def process_single_page(pdf_path, page_index, output_page_number, output_dir, formats=('jpg',), write_pdf=True, scale=2.0):
     """Process a single PDF page: extract, generate images, extract text"""
+    formats = normalize_formats(formats)
+    scale = normalize_scale(scale)
     doc = fitz.open(pdf_path)
+    try:
+        return _process_single_page_impl(doc, page_index, output_page_number, output_dir, formats, write_pdf, scale)
+    finally:
+        doc.close()
+
+def _process_single_page_impl(doc, page_index, output_page_number, output_dir, formats=('jpg',), write_pdf=True, scale=2.0):
+    """Process a single page of an already-open document"""
     page = doc[page_index]
 
     # Create output directory - convert output_dir to Path
     output_dir = Path(output_dir)
-    pages_dir = output_dir / 'pages'
-    pages_dir.mkdir(parents=True, exist_ok=True)
+    pages_dir = get_pages_dir(output_dir)
 
     page_prefix = f"page_{output_page_number}"
 
-    # 1. Extract single page as PDF
-    single_page_doc = fitz.open()
-    single_page_doc.insert_pdf(doc, from_page=page_index, to_page=page_index)
-    pdf_path_out = pages_dir / f"{page_prefix}.pdf"
-    single_page_doc.save(str(pdf_path_out))
-    single_page_doc.close()
-
-    # 2. Generate images (PNG and JPG) at high resolution
-    mat = fitz.Matrix(2.0, 2.0)  # 2x scale for high quality
-    pix = page.get_pixmap(matrix=mat)
+    # 1. Extract single page as PDF (skipped when only images are needed)
+    pdf_path_out = None
+    if write_pdf:
+        single_page_doc = fitz.open()
+        single_page_doc.insert_pdf(doc, from_page=page_index, to_page=page_index)
+        pdf_path_out = pages_dir / f"{page_prefix}.pdf"
+        single_page_doc.save(str(pdf_path_out))
+        single_page_doc.close()
 
-    # Save PNG
-    png_path = pages_dir / f"{page_prefix}.png"
-    pix.save(str(png_path))
-
-    # Convert to JPG using Pillow
-    img = Image.open(png_path)
-    jpg_path = pages_dir / f"{page_prefix}.jpg"
-    img.convert('RGB').save(jpg_path, 'JPEG', quality=90)
+    # 2. Generate images (JPG, and PNG if requested) at the requested scale
+    pix = page.get_pixmap(matrix=render_matrix(scale), colorspace=fitz.csRGB, alpha=False)
+    png_path, jpg_path = save_images(pix, pages_dir, page_prefix, formats)
 
     width = pix.width
     height = pix.height
@@ -77,8 +187,6 @@ def process_single_page(pdf_path, page_index, output_page_number, output_dir):
     # 3. Extract text with positions
     text_data = extract_text_with_positions(page)
 
-    doc.close()
-
     # Calculate paths relative to uploads directory (output_dir.parent.parent)
     # output_dir = /path/to/uploads/catalogs/9
     # output_dir.parent = /path/to/uploads/catalogs
@@ -86,17 +194,26 @@ def process_single_page(pdf_path, page_index, output_page_number, output_dir):
     uploads_dir = output_dir.parent.parent
 
     return {
-        'pdf_path': str(pdf_path_out.relative_to(uploads_dir)),
-        'png_path': str(png_path.relative_to(uploads_dir)),
-        'jpg_path': str(jpg_path.relative_to(uploads_dir)),
+        'pdf_path': str(pdf_path_out.relative_to(uploads_dir)) if pdf_path_out else None,
+        'png_path': str(png_path.relative_to(uploads_dir)) if png_path else None,
+        'jpg_path': str(jpg_path.relative_to(uploads_dir)) if jpg_path else None,
         'width': width,
         'height': height,
         'text_data': text_data
     }
 
-def process_double_page(pdf_path, page_index, start_page_number, output_dir):
+def process_double_page(pdf_path, page_index, start_page_number, output_dir, formats=('jpg',), write_pdf=True, scale=2.0):
     """Split a double page into two separate pages"""
+    formats = normalize_formats(formats)
+    scale = normalize_scale(scale)
     doc = fitz.open(pdf_path)
+    try:
+        return _process_double_page_impl(doc, page_index, start_page_number, output_dir, formats, write_pdf, scale)
+    finally:
+        doc.close()
+
+def _process_double_page_impl(doc, page_index, start_page_number, output_dir, formats=('jpg',), write_pdf=True, scale=2.0):
+    """Split a double page of an already-open document"""
     page = doc[page_index]
     rect = page.rect
 
@@ -112,49 +229,40 @@ def process_double_page(pdf_path, page_index, start_page_number, output_dir):
     results = []
 
     # Process left half
-    left_result = process_cropped_page(doc, page_index, start_page_number, output_dir, left_rect, 'left')
+    left_result = process_cropped_page(doc, page_index, start_page_number, output_dir, left_rect, 'left', formats, write_pdf, scale)
     results.append(left_result)
 
     # Process right half
-    right_result = process_cropped_page(doc, page_index, start_page_number + 1, output_dir, right_rect, 'right')
+    right_result = process_cropped_page(doc, page_index, start_page_number + 1, output_dir, right_rect, 'right', formats, write_pdf, scale)
     results.append(right_result)
 
-    doc.close()
     return results
 
-def process_cropped_page(doc, page_index, output_page_number, output_dir, crop_rect, side):
+def process_cropped_page(doc, page_index, output_page_number, output_dir, crop_rect, side, formats=('jpg',), write_pdf=True, scale=2.0):
     """Process a cropped portion of a page"""
     page = doc[page_index]
 
     # Ensure output_dir is a Path object
     output_dir = Path(output_dir) if not isinstance(output_dir, Path) else output_dir
-    pages_dir = output_dir / 'pages'
-    pages_dir.mkdir(parents=True, exist_ok=True)
+    pages_dir = get_pages_dir(output_dir)
 
     page_prefix = f"page_{output_page_number}"
 
-    # 1. Create cropped PDF
-    single_page_doc = fitz.open()
-    single_page_doc.insert_pdf(doc, from_page=page_index, to_page=page_index)
-    cropped_page = single_page_doc[0]
-    cropped_page.set_cropbox(crop_rect)
+    # 1. Create cropped PDF (skipped when only images are needed)
+    pdf_path_out = None
+    if write_pdf:
+        single_page_doc = fitz.open()
+        single_page_doc.insert_pdf(doc, from_page=page_index, to_page=page_index)
+        cropped_page = single_page_doc[0]
+        cropped_page.set_cropbox(crop_rect)
 
-    pdf_path_out = pages_dir / f"{page_prefix}.pdf"
-    single_page_doc.save(str(pdf_path_out))
-    single_page_doc.close()
+        pdf_path_out = pages_dir / f"{page_prefix}.pdf"
+        single_page_doc.save(str(pdf_path_out))
+        single_page_doc.close()
 
     # 2. Generate images from cropped area
-    mat = fitz.Matrix(2.0, 2.0)
-    pix = page.get_pixmap(matrix=mat, clip=crop_rect)
-
-    # Save PNG
-    png_path = pages_dir / f"{page_prefix}.png"
-    pix.save(str(png_path))
-
-    # Convert to JPG
-    img = Image.open(png_path)
-    jpg_path = pages_dir / f"{page_prefix}.jpg"
-    img.convert('RGB').save(jpg_path, 'JPEG', quality=90)
+    pix = page.get_pixmap(matrix=render_matrix(scale), clip=crop_rect, colorspace=fitz.csRGB, alpha=False)
+    png_path, jpg_path = save_images(pix, pages_dir, page_prefix, formats)
 
     width = pix.width
     height = pix.height
@@ -168,111 +276,203 @@ def process_cropped_page(doc, page_index, output_page_number, output_dir, crop_r
     uploads_dir = output_dir.parent.parent
 
     return {
-        'pdf_path': str(pdf_path_out.relative_to(uploads_dir)),
-        'png_path': str(png_path.relative_to(uploads_dir)),
-        'jpg_path': str(jpg_path.relative_to(uploads_dir)),
+        'pdf_path': str(pdf_path_out.relative_to(uploads_dir)) if pdf_path_out else None,
+        'png_path': str(png_path.relative_to(uploads_dir)) if png_path else None,
+        'jpg_path': str(jpg_path.relative_to(uploads_dir)) if jpg_path else None,
         'width': width,
         'height': height,
         'text_data': text_data
     }
 
+# Document opened once per batch worker (see _init_worker)
+_worker_doc = None
+
+def _init_worker(pdf_path):
+    """Pool initializer: open the PDF once for all tasks of this worker"""
+    global _worker_doc
+    _worker_doc = fitz.open(pdf_path)
+
+def _process_one(job):
+    """Process one batch task (single or double page) with the worker's document"""
+    output_dir, task = job
+    page_index = int(task['page_index'])
+    output_page_number = int(task['output_page_number'])
+
+    formats = normalize_formats(task.get('formats', ('jpg',)))
+    write_pdf = bool(task.get('write_pdf', True))
+    scale = normalize_scale(task.get('scale', 2.0))
+
+    if task.get('mode') == 'double':
+        results = _process_double_page_impl(_worker_doc, page_index, output_page_number, output_dir, formats, write_pdf, scale)
+    else:
+        results = [_process_single_page_impl(_worker_doc, page_index, output_page_number, output_dir, formats, write_pdf, scale)]
+
+    return {
+        'page_index': page_index,
+        'output_page_number': output_page_number,
+        'results': results
+    }
+
+def process_batch(pdf_path, output_dir, tasks):
+    """Process a list of pages in a single Python run using a worker pool.
+
+    Generator: yields one {page_index, output_page_number, results} record per
+    task as soon as it completes, so pages arrive in completion order.
+
+    Each task is {page_index, output_page_number, mode[, formats, write_pdf, scale]}
+    with mode 'single' or 'double', formats a list of 'jpg'/'png' (default
+    ['jpg']), write_pdf whether to save each page as a PDF (default true) and
+    scale the render zoom (default 2.0).
+    PyMuPDF documents cannot be pickled, so each worker opens the PDF once in
+    its initializer and reuses it for all of its tasks.
+    """
+    global _worker_doc
+
+    if not tasks:
+        return
+
+    workers = max(1, min(os.cpu_count() or 1, 4, len(tasks)))
+    output_dir = Path(output_dir)
+    jobs = [(output_dir, task) for task in tasks]
+
+    # Create the pages directory once, before the workers start (forked
+    # workers inherit the cache and skip the mkdir entirely)
+    get_pages_dir(output_dir)
+
+    if workers == 1:
+        # Not worth a pool: run in-process with a single open document
+        _init_worker(pdf_path)
+        try:
+            for job in jobs:
+                yield _process_one(job)
+        finally:
+            _worker_doc.close()
+            _worker_doc = None
+    else:
+        with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(pdf_path,)) as pool:
+            yield from pool.imap_unordered(_process_one, jobs)
+
+# Columns of the 'words' output of extract_text_with_positions
+WORD_FIELDS = ('text', 'x', 'y', 'width', 'height', 'font_name', 'font_size', 'paragraph')
+
+# get_text("words") flags: the defaults minus image and ligature preservation
+# (ligatures such as "ﬁ" are expanded, which also makes words searchable)
+WORD_FLAGS = fitz.TEXTFLAGS_WORDS & ~fitz.TEXT_PRESERVE_IMAGES & ~fitz.TEXT_PRESERVE_LIGATURES
+
 def extract_text_with_positions(page, clip_rect=None):
-    """Extract text with word and paragraph positions"""
-    # Use get_text("words") which is more robust in PyMuPDF 1.26+
+    """Extract text with word and paragraph positions
+
+    Returns {'paragraphs': [...], 'words': {field: [...]}} where words holds
+    one list per WORD_FIELDS entry, all indexed by word. words['paragraph']
+    is the index of the word's paragraph in 'paragraphs'.
+    """
+    # Use get_text("words") which is more robust in PyMuPDF 1.26+.
+    # No clip here: MuPDF clips per character and would split words that
+    # cross the fold of a double page; the clip is applied per word below.
     try:
-        word_list = page.get_text("words")
+        word_list = page.get_text("words", flags=WORD_FLAGS)
     except Exception as e:
         print(f"Error getting text: {e}", file=sys.stderr)
         import traceback
         traceback.print_exc(file=sys.stderr)
-        return {'paragraphs': [], 'words': []}
-
-    # Define clip boundaries if provided
-    clip_x0 = clip_rect.x0 if clip_rect else None
-    clip_y0 = clip_rect.y0 if clip_rect else None
-    clip_x1 = clip_rect.x1 if clip_rect else None
-    clip_y1 = clip_rect.y1 if clip_rect else None
+        return {'paragraphs': [], 'words': {field: [] for field in WORD_FIELDS}}
 
-    words = []
-    paragraphs = []
-
-    # Group words into paragraphs by Y position
-    current_para = None
-    last_y = None
-    line_threshold = 5.0  # pixels
+    boxes = []
+    texts = []
+    # Bound methods hoisted out of the per-word loop
+    boxes_append = boxes.append
+    texts_append = texts.append
 
     for word_tuple in word_list:
         # word_tuple format: (x0, y0, x1, y1, "word", block_no, line_no, word_no)
         if len(word_tuple) < 5:
             continue
 
-        orig_x0, orig_y0, orig_x1, orig_y1, text = word_tuple[:5]
+        x0, y0, x1, y1, text = word_tuple[:5]
 
         # Skip empty text
         if not text.strip():
             continue
 
-        # Filter by clip rect if provided
-        if clip_rect:
-            if (orig_x0 < clip_x0 or orig_x0 > clip_x1 or
-                orig_y0 < clip_y0 or orig_y0 > clip_y1):
-                continue
-
-            # Adjust coordinates relative to clip rect
-            x0 = orig_x0 - clip_x0
-            y0 = orig_y0 - clip_y0
-            x1 = orig_x1 - clip_x0
-            y1 = orig_y1 - clip_y0
-        else:
-            x0, y0, x1, y1 = orig_x0, orig_y0, orig_x1, orig_y1
-
-        # Create word entry
-        word_data = {
-            'text': text,
-            'x': float(x0),
-            'y': float(y0),
-            'width': float(x1 - x0),
-            'height': float(y1 - y0),
-            'font_name': 'Unknown',  # get_text("words") doesn't provide font info
-            'font_size': float(y1 - y0)  # Approximate font size from height
-        }
-        words.append(word_data)
-
-        # Group into paragraphs by Y position
-        if last_y is None or abs(y0 - last_y) > line_threshold:
-            # Start new paragraph
-            if current_para:
-                paragraphs.append(current_para)
-
-            current_para = {
-                'text': text,
-                'x': float(x0),
-                'y': float(y0),
-                'width': float(x1 - x0),
-                'height': float(y1 - y0),
-                'word_count': 1
-            }
-        else:
-            # Continue current paragraph
-            current_para['text'] += ' ' + text
-            current_para['width'] = max(current_para['width'], x1 - current_para['x'])
-            current_para['height'] = max(current_para['height'], y1 - y0)
-            current_para['word_count'] += 1
-
-        last_y = y0
-
-    # Add last paragraph
-    if current_para:
-        paragraphs.append(current_para)
+        boxes_append((x0, y0, x1, y1))
+        texts_append(text)
+
+    boxes = np.array(boxes, dtype=np.float64).reshape(-1, 4)
+
+    if clip_rect:
+        # Filter by clip rect: a word belongs to the clip containing its
+        # origin (x0, y0), so a word crossing the fold stays whole on one side
+        keep = ((boxes[:, 0] >= clip_rect.x0) & (boxes[:, 0] <= clip_rect.x1) &
+                (boxes[:, 1] >= clip_rect.y0) & (boxes[:, 1] <= clip_rect.y1))
+        boxes = boxes[keep]
+        texts = [texts[i] for i in np.flatnonzero(keep).tolist()]
+
+        # Adjust coordinates relative to clip rect
+        boxes -= (clip_rect.x0, clip_rect.y0, clip_rect.x0, clip_rect.y0)
+
+    paragraphs, word_paragraphs = group_paragraphs(boxes, texts)
+
+    # Words are emitted column-wise (one list per field) to keep the JSON small;
+    # tolist() converts each whole column to Python floats in one call
+    x0, y0, x1, y1 = boxes.T
+    heights = (y1 - y0).tolist()
+    words = {
+        'text': texts,
+        'x': x0.tolist(),
+        'y': y0.tolist(),
+        'width': (x1 - x0).tolist(),
+        'height': heights,
+        'font_name': ['Unknown'] * len(texts),  # get_text("words") doesn't provide font info
+        'font_size': heights,  # Approximate font size from height
+        'paragraph': word_paragraphs
+    }
 
     return {
         'paragraphs': paragraphs,
         'words': words
     }
 
+def group_paragraphs(boxes, texts, line_threshold=5.0):
+    """Group words into paragraphs: a new one starts when y0 jumps by more than line_threshold
+
+    boxes is an (N, 4) array of word (x0, y0, x1, y1), texts the matching words.
+    Returns (paragraphs, word_paragraphs) where word_paragraphs[i] is the
+    index of word i's paragraph.
+    """
+    if len(texts) == 0:
+        return [], []
+
+    y0 = boxes[:, 1]
+
+    # Vectorized boundary detection: compare each word's y0 with the previous one
+    breaks = np.empty(len(texts), dtype=bool)
+    breaks[0] = True
+    breaks[1:] = np.abs(np.diff(y0)) > line_threshold
+    starts = np.flatnonzero(breaks)
+    ends = np.append(starts[1:], len(texts))
+
+    # Paragraph bbox = union of its word boxes, as one min/max reduction each
+    mins = np.minimum.reduceat(boxes[:, :2], starts, axis=0).tolist()
+    maxs = np.maximum.reduceat(boxes[:, 2:], starts, axis=0).tolist()
+
+    # The paragraph count is known up front: build the list in one comprehension
+    paragraphs = [
+        {
+            'text': ' '.join(texts[start:end]),
+            'x': para_x0,
+            'y': para_y0,
+            'width': para_x1 - para_x0,
+            'height': para_y1 - para_y0,
+            'word_count': end - start
+        }
+        for start, end, (para_x0, para_y0), (para_x1, para_y1) in zip(starts.tolist(), ends.tolist(), mins, maxs)
+    ]
+
+    return paragraphs, (np.cumsum(breaks) - 1).tolist()
+
 def main():
     if len(sys.argv) < 4:
-        print(json.dumps({'error': 'Usage: pdf_processor.py <command> <pdf_path> <output_dir> [page_index]'}))
+        print(_dumps({'error': 'Usage: pdf_processor.py <command> <pdf_path> <output_dir> [page_index page_number [scale]] (process_batch reads tasks JSON on stdin)'}))
         sys.exit(1)
 
     command = sys.argv[1]
@@ -283,7 +483,7 @@ def main():
         if command == 'analyze':
             # Analyze pages for double page detection
             page_structure = analyze_pages(pdf_path)
-            print(json.dumps({
+            print(_dumps({
                 'success': True,
                 'page_structure': page_structure
             }))
@@ -292,8 +492,9 @@ def main():
             # Process single page
             page_index = int(sys.argv[4])
             output_page_number = int(sys.argv[5])
-            result = process_single_page(pdf_path, page_index, output_page_number, output_dir)
-            print(json.dumps({
+            scale = float(sys.argv[6]) if len(sys.argv) > 6 else 2.0
+            result = process_single_page(pdf_path, page_index, output_page_number, output_dir, scale=scale)
+            print(_dumps({
                 'success': True,
                 'result': result
             }))
@@ -302,19 +503,33 @@ def main():
             # Process double page (split into two)
             page_index = int(sys.argv[4])
             start_page_number = int(sys.argv[5])
-            results = process_double_page(pdf_path, page_index, start_page_number, output_dir)
-            print(json.dumps({
+            scale = float(sys.argv[6]) if len(sys.argv) > 6 else 2.0
+            results = process_double_page(pdf_path, page_index, start_page_number, output_dir, scale=scale)
+            print(_dumps({
                 'success': True,
                 'results': results
             }))
 
+        elif command == 'process_batch':
+            # Process many pages at once. The JSON list of tasks is read from
+            # stdin (it can exceed the per-argument size limit of argv).
+            # Output is JSON lines: one record per page as it completes, then
+            # a final {'success': true, 'done': true} record
+            tasks = json.load(sys.stdin)
+            for page in process_batch(pdf_path, output_dir, tasks):
+                print(_dumps(page), flush=True)
+            print(_dumps({
+                'success': True,
+                'done': True
+            }))
+
         else:
-            print(json.dumps({'error': f'Unknown command: {command}'}))
+            print(_dumps({'error': f'Unknown command: {command}'}))
             sys.exit(1)
 
     except Exception as e:
         # Print error as JSON to stdout (not stderr) so Node.js can parse it
-        print(json.dumps({
+        print(_dumps({
             'success': False,
             'error': str(e)
         }))
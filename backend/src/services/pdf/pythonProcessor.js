@@ -1,6 +1,7 @@
 import { spawn } from 'child_process';
 import fs from 'fs/promises';
 import path from 'path';
+import readline from 'readline';
 import { fileURLToPath } from 'url';
 import { dirname } from 'path';
 import db, { initTextDb, getTextDb } from '../../config/database.js';
@@ -8,6 +9,9 @@ import db, { initTextDb, getTextDb } from '../../config/database.js';
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = dirname(__filename);
 
+// Batch records (pages) buffered in Node before reading from Python pauses
+const MAX_PENDING_RECORDS = 2;
+
 export class PythonPDFProcessor {
   constructor(catalogId, filePath, uploadDir) {
     this.catalogId = catalogId;
@@ -22,18 +26,23 @@ export class PythonPDFProcessor {
       const pythonArgs = [this.pythonScript, command, ...args];
       const python = spawn('python3', pythonArgs);
 
+      // Decode as UTF-8 streams: orjson writes raw UTF-8, and a multi-byte
+      // character can be split across two chunks
+      python.stdout.setEncoding('utf8');
+      python.stderr.setEncoding('utf8');
+
       let stdout = '';
       let stderr = '';
 
       python.stdout.on('data', (data) => {
-        stdout += data.toString();
+        stdout += data;
       });
 
-      python.stderr.on('data', (data) => {
-        stderr += data.toString();
-        // Log stderr for debugging
-        if (stderr.trim()) {
-          console.log(stderr.trim());
+      python.stderr.on('data', (chunk) => {
+        stderr += chunk;
+        // Log stderr for debugging (only the new chunk, not everything so far)
+        if (chunk.trim()) {
+          console.log(chunk.trim());
         }
       });
 
@@ -66,6 +75,103 @@ export class PythonPDFProcessor {
     });
   }
 
+  // Like callPython, for commands that print one JSON record per line
+  // (process_batch). input, if given, is written to the child's stdin.
+  // onRecord runs for each record, one at a time in arrival order, while
+  // Python keeps working on the next pages. If onRecord fails, Python is
+  // stopped and the promise rejects with that error.
+  async streamPython(command, args, onRecord, input = null) {
+    return new Promise((resolve, reject) => {
+      const pythonArgs = [this.pythonScript, command, ...args];
+      const python = spawn('python3', pythonArgs);
+      const lines = readline.createInterface({ input: python.stdout });
+      python.stderr.setEncoding('utf8');
+
+      // A write error (e.g. Python exited early) is reported by 'close' below
+      python.stdin.on('error', () => {});
+      python.stdin.end(input ?? undefined);
+
+      let stderr = '';
+      let error = null;
+      let done = false;
+      let queue = Promise.resolve();
+      let pending = 0;
+
+      // Keep the first error and stop Python; 'close' below rejects with it
+      const fail = (err) => {
+        if (!error) {
+          error = err;
+        }
+        python.kill();
+      };
+
+      lines.on('line', (line) => {
+        if (!line.trim() || error) {
+          return;
+        }
+
+        let record;
+        try {
+          record = JSON.parse(line);
+        } catch (err) {
+          fail(new Error(`Failed to parse Python output: ${err.message}\nOutput: ${line}`));
+          return;
+        }
+
+        if (record.success === false) {
+          error = new Error(record.error || 'Python script failed');
+        } else if (record.done) {
+          done = true;
+        } else {
+          // Backpressure: stop reading while records wait to be saved, so
+          // pages do not pile up in memory when saving is slower than Python
+          pending++;
+          if (pending >= MAX_PENDING_RECORDS) {
+            lines.pause();
+          }
+
+          // The catch keeps queue from ever being a rejected promise: an
+          // unhandled rejection would crash the server before 'close'
+          queue = queue
+            .then(() => (error ? undefined : onRecord(record)))
+            .catch(fail)
+            .finally(() => {
+              pending--;
+              if (pending < MAX_PENDING_RECORDS) {
+                lines.resume();
+              }
+            });
+        }
+      });
+
+      python.stderr.on('data', (chunk) => {
+        // Keep the full stderr for error messages, but only log the new chunk:
+        // this process lives for the whole catalog
+        stderr += chunk;
+        if (chunk.trim()) {
+          console.log(chunk.trim());
+        }
+      });
+
+      python.on('close', (code) => {
+        // Wait for the records already received to be handled
+        queue.then(() => {
+          if (error) {
+            reject(error);
+          } else if (code !== 0 || !done) {
+            reject(new Error(`Python script exited with code ${code}: ${stderr || 'No error message'}`));
+          } else {
+            resolve();
+          }
+        });
+      });
+
+      python.on('error', (err) => {
+        reject(new Error(`Failed to spawn Python process: ${err.message}`));
+      });
+    });
+  }
+
   async process() {
     let textDb = null;
 
@@ -96,29 +202,22 @@ export class PythonPDFProcessor {
         status: 'processing',
       });
 
-      // 2. Process each page
+      // 2. Process all pages in a single Python run (parallelized there)
+      const tasks = [];
       let outputPageNumber = 1;
       for (let i = 0; i < pageStructure.length; i++) {
-        const pageInfo = pageStructure[i];
-        console.log(`Processing source page ${i + 1}/${pageStructure.length} (output page ${outputPageNumber})`);
-
-        try {
-          if (pageInfo.is_double_page) {
-            // Split into two pages
-            console.log(`  Splitting double page into pages ${outputPageNumber} and ${outputPageNumber + 1}`);
-            await this.processDoublePage(i, outputPageNumber, textDb);
-            outputPageNumber += 2;
-          } else {
-            // Process as single page
-            await this.processSinglePage(i, outputPageNumber, textDb);
-            outputPageNumber += 1;
-          }
-        } catch (error) {
-          console.error(`Error processing page ${i + 1}:`, error);
-          throw error;
-        }
+        const isDouble = pageStructure[i].is_double_page;
+        tasks.push({
+          page_index: i,
+          output_page_number: outputPageNumber,
+          mode: isDouble ? 'double' : 'single',
+        });
+        outputPageNumber += isDouble ? 2 : 1;
       }
 
+      console.log(`Processing ${tasks.length} source pages in batch...`);
+      await this.processBatch(tasks, textDb);
+
       // Update catalog status
       await db('catalogs').where({ id: this.catalogId }).update({
         processed: true,
@@ -145,6 +244,22 @@ export class PythonPDFProcessor {
     }
   }
 
+  async processBatch(tasks, textDb) {
+    // Call Python once for all pages; save each page as soon as it arrives
+    // (pages come in completion order, not page order). Tasks go through
+    // stdin: as a single argv string they would hit the 128 KiB limit.
+    await this.streamPython('process_batch', [
+      this.filePath,
+      this.outputDir
+    ], async (page) => {
+      for (let i = 0; i < page.results.length; i++) {
+        const outputPageNumber = page.output_page_number + i;
+        const pageId = await this.savePage(outputPageNumber, page.results[i], textDb);
+        console.log(`Page ${outputPageNumber} processed successfully (ID: ${pageId})`);
+      }
+    }, JSON.stringify(tasks));
+  }
+
   async processSinglePage(pageIndex, outputPageNumber, textDb) {
     // Call Python to process single page
     const result = await this.callPython('process_page', [
@@ -154,23 +269,7 @@ export class PythonPDFProcessor {
       outputPageNumber.toString()
     ]);
 
-    const pageData = result.result;
-
-    // Save text data to SQLite
-    await this.saveTextData(outputPageNumber, pageData.text_data, textDb);
-
-    // Create page record in database
-    const [pageId] = await db('pages').insert({
-      catalog_id: this.catalogId,
-      page_number: outputPageNumber,
-      pdf_path: pageData.pdf_path,
-      png_path: pageData.png_path,
-      jpg_path: pageData.jpg_path,
-      svg_path: null,
-      text_db_path: `catalogs/${this.catalogId}/text.db`,
-      width: pageData.width,
-      height: pageData.height,
-    });
+    const pageId = await this.savePage(outputPageNumber, result.result, textDb);
 
     console.log(`Page ${outputPageNumber} processed successfully (ID: ${pageId})`);
     return pageId;
@@ -189,30 +288,44 @@ export class PythonPDFProcessor {
 
     // Process both pages (left and right)
     for (let i = 0; i < results.length; i++) {
-      const pageData = results[i];
-      const outputPageNumber = startPageNumber + i;
-
-      // Save text data to SQLite
-      await this.saveTextData(outputPageNumber, pageData.text_data, textDb);
-
-      // Create page record in database
-      await db('pages').insert({
-        catalog_id: this.catalogId,
-        page_number: outputPageNumber,
-        pdf_path: pageData.pdf_path,
-        png_path: pageData.png_path,
-        jpg_path: pageData.jpg_path,
-        svg_path: null,
-        text_db_path: `catalogs/${this.catalogId}/text.db`,
-        width: pageData.width,
-        height: pageData.height,
-      });
+      await this.savePage(startPageNumber + i, results[i], textDb);
     }
   }
 
+  async savePage(outputPageNumber, pageData, textDb) {
+    // Save text data to SQLite
+    await this.saveTextData(outputPageNumber, pageData.text_data, textDb);
+
+    // Create page record in database
+    const [pageId] = await db('pages').insert({
+      catalog_id: this.catalogId,
+      page_number: outputPageNumber,
+      pdf_path: pageData.pdf_path,
+      png_path: pageData.png_path,
+      jpg_path: pageData.jpg_path,
+      svg_path: null,
+      text_db_path: `catalogs/${this.catalogId}/text.db`,
+      width: pageData.width,
+      height: pageData.height,
+    });
+
+    return pageId;
+  }
+
   async saveTextData(pageNumber, textData, textDb) {
+    const words = textData.words;
+    const paragraphs = textData.paragraphs;
+
+    // Bucket words by their paragraph index in a single pass.
+    // Words are columnar: one array per field, indexed by word.
+    const wordsByParagraph = paragraphs.map(() => []);
+    for (let i = 0; i < words.text.length; i++) {
+      wordsByParagraph[words.paragraph[i]].push(i);
+    }
+
     // Insert paragraphs
-    for (const para of textData.paragraphs) {
+    for (let p = 0; p < paragraphs.length; p++) {
+      const para = paragraphs[p];
       const [paraId] = await textDb('paragraphs').insert({
         page_number: pageNumber,
         text: para.text,
@@ -223,29 +336,23 @@ export class PythonPDFProcessor {
         word_count: para.word_count,
       });
 
-      // Find words that belong to this paragraph (approximate by position)
-      const paraWords = textData.words.filter(w =>
-        w.x >= para.x && w.x <= para.x + para.width &&
-        w.y >= para.y && w.y <= para.y + para.height
-      );
-
-      // Insert words
-      for (const word of paraWords) {
+      // Insert words of this paragraph
+      for (const i of wordsByParagraph[p]) {
         await textDb('words').insert({
           page_number: pageNumber,
-          text: word.text,
-          x: word.x,
-          y: word.y,
-          width: word.width,
-          height: word.height,
-          font_name: word.font_name,
-          font_size: word.font_size,
+          text: words.text[i],
+          x: words.x[i],
+          y: words.y[i],
+          width: words.width[i],
+          height: words.height[i],
+          font_name: words.font_name[i],
+          font_size: words.font_size[i],
           paragraph_id: paraId,
         });
       }
     }
 
-    console.log(`  Extracted text: ${textData.paragraphs.length} paragraphs, ${textData.words.length} words`);
+    console.log(`  Extracted text: ${textData.paragraphs.length} paragraphs, ${words.text.length} words`);
   }
 }
 
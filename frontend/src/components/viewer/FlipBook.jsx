@@ -28,7 +28,7 @@ const Page = forwardRef(({ page, onAreaClick, number, highlightedWords = [] }, r
   return (
     <div ref={ref} className="page">
       <img
-        src={`/uploads/${page.png_path}`}
+        src={`/uploads/${page.jpg_path || page.png_path}`}
         alt={`Page ${page.page_number}`}
         draggable={false}
       />